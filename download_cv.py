@@ -2,6 +2,9 @@ import pandas as pd
 import os
 import gdown
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 # --- PENGATURAN ---
 CSV_FILE_PATH = 'dataset_magang.csv'
@@ -9,6 +12,10 @@ DOWNLOAD_FOLDER = 'cv'
 COLUMN_NAME = 'CV'
 # Nama file log untuk mencatat link yang sudah di-download
 LOG_FILE_NAME = '_download_log.txt'
+# Jumlah download paralel dan retry saat kena limit Google Drive
+MAX_WORKERS = 8
+MAX_RETRIES = 3
+BACKOFF_SECONDS = 2  # jeda 2, 4, 8 detik antar retry
 # --------------------
 
 def load_downloaded_links(log_path):
@@ -24,14 +31,41 @@ def load_downloaded_links(log_path):
             print(f"Peringatan: Gagal membaca file log: {e}")
     return downloaded
 
-def add_to_log(link, log_path):
-    """Menambahkan satu link ke file log."""
+def add_to_log(link, log_fp):
+    """Menambahkan satu link ke file log yang sudah dibuka."""
     try:
-        with open(log_path, 'a') as f:
-            f.write(link + '\n')
+        log_fp.write(link + '\n')
     except Exception as e:
         print(f"Peringatan: Gagal menulis ke file log: {e}")
 
+def download_one(index, link, total, log_fp, log_lock):
+    """Mengunduh satu link; mengembalikan True bila berhasil."""
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            # Panggil gdown.download (quiet agar output beberapa thread tidak bertumpuk)
+            file_name = gdown.download(link, quiet=True, fuzzy=True)
+
+            # Jika download berhasil (gdown mengembalikan nama file)
+            if file_name:
+                print(f"({index}/{total}) BERHASIL diunduh sebagai: '{file_name}'")
+                with log_lock:
+                    add_to_log(link, log_fp) # Catat ke log
+                return True
+            # Ini terjadi jika gdown gagal tapi tidak error (jarang)
+            print(f"({index}/{total}) GAGAL (gdown tidak mengembalikan nama file): {link}")
+            return False
+
+        except Exception as e:
+            # "Cannot retrieve..." berarti kena limit → tunggu makin lama lalu coba lagi.
+            # Error lain (mis. "Permission denied") tidak di-retry.
+            error_message = str(e).split('\n')[0] # Ambil baris pertama error
+            if 'Cannot retrieve' in str(e) and attempt < MAX_RETRIES:
+                time.sleep(BACKOFF_SECONDS * 2 ** attempt)
+                continue
+            print(f"({index}/{total}) GAGAL: {error_message}... ({link})")
+            return False
+    return False
+
 def main():
     print(f"Memulai proses download...")
 
@@ -49,7 +83,8 @@ def main():
 
     # 3. Baca file CSV
     try:
-        df = pd.read_csv(csv_path, skiprows=1)
+        # Hanya kolom link yang diparse; callable agar kolom hilang tidak langsung error
+        df = pd.read_csv(csv_path, skiprows=1, usecols=lambda c: c == COLUMN_NAME, dtype=str)
         print(f"Berhasil membaca file: {CSV_FILE_PATH}")
     except Exception as e:
         print(f"ERROR saat membaca CSV: {e}")
@@ -60,7 +95,10 @@ def main():
         print(f"ERROR: Kolom '{COLUMN_NAME}' tidak ditemukan.")
         return
         
-    links = df[COLUMN_NAME].dropna().unique()
+    # Filter link valid (Google Drive) sekaligus, bukan per iterasi
+    links = (df[COLUMN_NAME].dropna().str.strip()
+             .loc[lambda s: s.str.contains('drive.google.com', na=False, regex=False)]
+             .unique())
     print(f"Ditemukan total {len(links)} link unik.")
 
     # 5. Pindah ke folder download
@@ -69,52 +107,30 @@ def main():
     
     print("\n--- Mulai Memeriksa dan Mengunduh File (Logika Baru) ---")
 
-    # 6. Loop dan download
-    success_count = 0
-    fail_count = 0
-    skipped_count = 0
+    # 6. Saring link yang sudah ada di log, lalu download paralel
+    new_links = [link for link in links if link not in downloaded_links]
+    skipped_count = len(links) - len(new_links)
+    print(f"{skipped_count} link SUDAH ADA DI LOG, dilewati. {len(new_links)} link baru akan diunduh.")
 
-    for i, link in enumerate(links):
-        link_str = str(link).strip() # Pastikan bersih dari spasi
-        
-        if not link_str or 'drive.google.com' not in link_str:
-            print(f"\n({i+1}/{len(links)}) Melewatkan: '{link_str[:50]}...' (Link tidak valid)")
-            continue
-
-        print(f"\n({i+1}/{len(links)}) Memeriksa: {link_str}")
-        
-        # === LOGIKA BARU: Cek berdasarkan file log ===
-        if link_str in downloaded_links:
-            print("... SUDAH ADA DI LOG. MELEWATKAN.")
-            skipped_count += 1
-            success_count += 1 # Anggap sukses karena sudah ada
-            continue
-            
-        # Jika belum ada di log, coba download
-        print("... Link baru, mencoba mengunduh...")
-        try:
-            # Panggil gdown.download
-            file_name = gdown.download(link_str, quiet=False, fuzzy=True)
-            
-            # Jika download berhasil (gdown mengembalikan nama file)
-            if file_name:
-                print(f"... BERHASIL diunduh sebagai: '{file_name}'")
-                add_to_log(link_str, log_file_path) # Catat ke log
-                success_count += 1
-            else:
-                # Ini terjadi jika gdown gagal tapi tidak error (jarang)
-                print("... GAGAL (gdown tidak mengembalikan nama file).")
-                fail_count += 1
+    # Log dibuka sekali (line-buffered) untuk semua download
+    try:
+        log_fp = open(log_file_path, 'a', buffering=1)
+    except Exception as e:
+        print(f"ERROR: Gagal membuka file log: {e}")
+        os.chdir(original_cwd)
+        return
 
-        except Exception as e:
-            # Ini akan menangkap error "Cannot retrieve..." (kena limit)
-            # atau error "Permission denied"
-            error_message = str(e).split('\n')[0] # Ambil baris pertama error
-            print(f"... GAGAL: {error_message}...")
-            fail_count += 1
-        
-        # Beri jeda 1 detik
-        time.sleep(1)
+    log_lock = threading.Lock()
+    worker = partial(download_one, total=len(new_links), log_fp=log_fp, log_lock=log_lock)
+    try:
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            results = list(executor.map(worker, range(1, len(new_links) + 1), new_links))
+    finally:
+        log_fp.close()
+
+    downloaded_count = sum(results)
+    success_count = skipped_count + downloaded_count # yg dilewati dianggap sukses
+    fail_count = len(new_links) - downloaded_count
 
     # 7. Kembali ke folder semula
     os.chdir(original_cwd)
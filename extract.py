@@ -1,15 +1,48 @@
 # extract.py
-import os, re, logging
+import os, io, re, logging, threading, argparse, hashlib, shutil
+from functools import lru_cache
 import pandas as pd
 import pdfplumber
-from typing import Dict, List, Optional, Any
+from contextlib import closing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+from typing import Dict, Iterator, List, Optional, Any, Tuple
 from datetime import datetime
+from pdfminer.converter import TextConverter
+from pdfminer.layout import LAParams
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+
+try:
+    from tqdm import tqdm
+except ImportError:  # progress bar opsional
+    tqdm = None
+
+try:
+    import pypdfium2 as pdfium  # ekstraksi teks cepat untuk PDF born-digital
+except ImportError:
+    pdfium = None
+
+try:
+    import ahocorasick  # pyahocorasick: scan semua keyword dalam satu pass
+except ImportError:
+    ahocorasick = None
 
 # ==============================
 # KONFIGURASI
 # ==============================
 USE_OCR = True  # aktifkan OCR fallback untuk PDF gambar
 TESSERACT_CMD = r"C:\Program Files\Tesseract-OCR\tesseract.exe"  # ubah bila perlu
+MAX_WORKERS = min(os.cpu_count() or 1, 6)  # proses paralel; >6 tidak menambah speedup (I/O)
+ENABLE_TABLES = False  # tabel CV jarang memuat IPK/jurusan/semester
+TABLE_MIN_EDGES = 20   # halaman dengan garis/edge sebanyak ini dianggap berisi tabel
+MIN_TEXT_CHARS = 400   # teks sepanjang ini dianggap born-digital → lewati tabel & OCR
+USE_TEXT_CACHE = True  # simpan hasil pdfplumber/OCR di disk untuk run berikutnya
+TEXT_CACHE_DIR = "text_cache"
+OCR_RESOLUTION = 200   # cukup untuk teks 10-12pt
+OCR_CONFIG = '--oem 1 --psm 6'  # LSTM saja, satu blok teks
+OCR_WORKERS = 4        # thread OCR per PDF; PDF <= 2 halaman tetap serial
+FAST_TEXT_MODE = True  # tanpa pypdfium2: teks mentah pdfminer dulu sebelum pdfplumber
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -47,40 +80,93 @@ MAJOR_NORMALIZE = {
 
 ABBREV_MAP = {'si':'Sistem Informasi','ti':'Teknik Informatika','tk':'Teknik Komputer','dkv':'Desain Komunikasi Visual'}
 
-RE_DEGREE = re.compile(r'(?i)\b(S1|S2|S3|D1|D2|D3|D4)\b')
+# pola di bawah dicocokkan ke teks yang sudah lowercase (tanpa (?i))
+RE_DEGREE = re.compile(r'\b(s1|s2|s3|d1|d2|d3|d4)\b')
+RE_DEGREE_ABBREV = re.compile(r'\b(s1|s2|s3|d1|d2|d3|d4)\s+(si|ti|tk|dkv)\b')
+# degree dalam 40 char sebelum/sesudah keyword jurusan, dicek pada jendela di sekitar keyword;
+# jendela > 40 + panjang degree agar \b di tepi jendela tetap sama dengan di teks penuh
+RE_DEGREE_BEFORE = re.compile(r'\b(s1|s2|s3|d1|d2|d3|d4)\b.{0,40}\Z')
+RE_DEGREE_AFTER  = re.compile(r'.{0,40}\b(s1|s2|s3|d1|d2|d3|d4)\b')
+DEGREE_WINDOW = 45
+# fallback tanpa pyahocorasick: satu alternation (terpanjang dulu) di dalam lookahead, jadi
+# keyword yang tumpang tindih di posisi berbeda tetap terlihat dalam satu pass
+RE_MAJOR_ANY = re.compile(r'\b(?=(' + '|'.join(map(re.escape, sorted(MAJOR_NORMALIZE, key=len, reverse=True))) + r')\b)')
+# keyword lebih pendek yang jadi awalan keyword lain (mulai di posisi yang sama, tertutup alternation)
+_MAJOR_PREFIXES = {k: [p for p in MAJOR_NORMALIZE if p != k and k.startswith(p)] for k in MAJOR_NORMALIZE}
 RE_IPK_NEAR = [
-    re.compile(r'(?i)\bIPK\s*[:\-]?\s*([0-4][\.,][0-9]{2,3})'),
-    re.compile(r'(?i)\bGPA\s*[:\-]?\s*([0-4][\.,][0-9]{2,3})'),
-    re.compile(r'(?i)\bIndeks\s+Prestasi(?:\s*Kumulatif)?\s*[:\-]?\s*([0-4][\.,][0-9]{2,3})'),
-    re.compile(r'(?i)([0-4][\.,][0-9]{2,3})\s*(?:/|dari|out of)\s*4'),
+    re.compile(r'\bipk\s*[:\-]?\s*([0-4][\.,][0-9]{2,3})'),
+    re.compile(r'\bgpa\s*[:\-]?\s*([0-4][\.,][0-9]{2,3})'),
+    re.compile(r'\bindeks\s+prestasi(?:\s*kumulatif)?\s*[:\-]?\s*([0-4][\.,][0-9]{2,3})'),
+    re.compile(r'([0-4][\.,][0-9]{2,3})\s*(?:/|dari|out of)\s*4'),
 ]
 RE_SEM_NEAR = [
-    re.compile(r'(?i)\bsemester\s*[:\-]?\s*(1[0-2]|[1-9])\b'),
-    re.compile(r'(?i)\bsem\s*[:\-]?\s*(1[0-2]|[1-9])\b'),
-    re.compile(r'(?i)\b(1[0-2]|[1-9])\b\s*(?:th|tahun)?\s*(?:semester|sem)\b'),
+    re.compile(r'\bsemester\s*[:\-]?\s*(1[0-2]|[1-9])\b'),
+    re.compile(r'\bsem\s*[:\-]?\s*(1[0-2]|[1-9])\b'),
+    re.compile(r'\b(1[0-2]|[1-9])\b\s*(?:th|tahun)?\s*(?:semester|sem)\b'),
 ]
+# IPK + semester dalam satu scanner: tiap pola jadi grup bernama (ipk0.., sem0..) di dalam
+# lookahead, jadi match yang tumpang tindih antar-pola tetap terlihat. Nomor pola = prioritas.
+_FIELD_PATTERNS = ([('ipk', i, rex) for i, rex in enumerate(RE_IPK_NEAR)] +
+                   [('semester', i, rex) for i, rex in enumerate(RE_SEM_NEAR)])
+RE_FIELDS = re.compile('|'.join(f'(?=(?P<{f}{i}>{rex.pattern}))' for f, i, rex in _FIELD_PATTERNS))
+
+def _parse_ipk(s: str) -> Optional[float]:
+    try:
+        v = float(s.replace(',', '.'))
+    except ValueError:
+        return None
+    return round(v, 2) if 2.0 <= v <= 4.0 else None
+
+def _parse_semester(s: str) -> Optional[int]:
+    try:
+        v = int(s)
+    except ValueError:
+        return None
+    return v if 1 <= v <= 12 else None
+
+# nama grup → (slot: 0=ipk/1=semester, prioritas, index grup nilai di dalamnya, parser)
+_FIELD_SLOTS = {'ipk': (0, _parse_ipk), 'semester': (1, _parse_semester)}
+_FIELD_GROUPS = {f'{f}{i}': (_FIELD_SLOTS[f][0], i, RE_FIELDS.groupindex[f'{f}{i}'] + 1, _FIELD_SLOTS[f][1])
+                 for f, i, _ in _FIELD_PATTERNS}
+
+def extract_fields(low: str) -> Tuple[Optional[float], Optional[int]]:
+    # satu pass RE_FIELDS untuk (ipk, semester) pada teks lowercase; hasil sama dengan
+    # extract_ipk/extract_semester (pola prioritas lebih tinggi menang, lalu posisi paling awal).
+    # Loop panas per halaman: state di list 2 slot, bukan dict per field
+    ranks: List[Optional[int]] = [None, None]
+    values: List[Any] = [None, None]
+    for m in RE_FIELDS.finditer(low):
+        slot, rank, group, parse = _FIELD_GROUPS[m.lastgroup]
+        cur = ranks[slot]
+        if cur is not None and cur <= rank: continue
+        v = parse(m.group(group))
+        if v is None: continue
+        ranks[slot] = rank
+        values[slot] = v
+        # pola prioritas tertinggi untuk kedua field sudah ketemu → tidak bisa dikalahkan
+        if ranks[0] == 0 and ranks[1] == 0: break
+    return values[0], values[1]
 
 # nama dari filename (tanpa fallback jurusan)
-RE_PREFIX_NUMBER_DOT   = re.compile(r'^\s*\d+\s*\.\s*')
+RE_NON_ALPHA           = re.compile(r'[^A-Za-z\s]+')
 RE_CV_ANY              = re.compile(r'(?i)\bcurriculum\s+vitae\b|\bcv\b')
-RE_SPACES              = re.compile(r'\s+')
+@lru_cache(maxsize=4096)  # fungsi murni; dipanggil lagi di jalur error untuk file yang sama
 def clean_person_name_from_filename(filename: str) -> str:
     s = os.path.splitext(os.path.basename(filename))[0]
-    s = RE_PREFIX_NUMBER_DOT.sub('', s)
-    s = s.replace('_',' ').replace('-',' ').replace('.',' ')
+    # satu pass: angka (termasuk prefix "1." dan "(2)"), '_', '-', '.', dan tanda baca lain → spasi
+    s = RE_NON_ALPHA.sub(' ', s)
     s = RE_CV_ANY.sub(' ', s)
-    s = re.sub(r'\(\s*\d+\s*\)', ' ', s)
-    s = re.sub(r'\d+', ' ', s)
-    s = re.sub(r'[^A-Za-z\s]', ' ', s)
-    s = RE_SPACES.sub(' ', s).strip()
-    toks = s.split()
+    toks = s.split()  # split() tanpa argumen sudah menormalkan & membuang whitespace
     if not toks: return ""
     if len(toks) > 6: toks = toks[:6]
     return ' '.join(w.capitalize() for w in toks)
 
 # Skills
 SKILL_SYNONYM = {'rest': 'REST','rest api': 'REST','node': 'Nodejs','node.js': 'Nodejs',
-                 'adobe xd': 'Adobe Xd','c plus plus': 'C++','c sharp': 'C#'}
+                 'adobe xd': 'Adobe Xd','c plus plus': 'C++','c sharp': 'C#',
+                 # bentuk bersufiks: token utuh, jadi tidak lagi ketemu lewat substring
+                 'reactjs': 'React','vuejs': 'Vue','angularjs': 'Angular','expressjs': 'Express',
+                 'html5': 'HTML','css3': 'CSS'}
 SKILL_SET = {
     'python','java','javascript','typescript','html','css','php','ruby','swift',
     'kotlin','c++','c#','go','react','vue','angular','nodejs','express','django','flask','laravel',
@@ -90,117 +176,396 @@ SKILL_SET = {
     'tableau','power bi','google analytics','spss','linux','windows server','macos','git','graphql','rest',
     'microservices','agile','scrum','jira','trello','notion'
 }
+# skill dicocokkan per token (set lookup), bukan substring: 'go' tidak lagi cocok di 'google'
+RE_SKILL_TOKEN = re.compile(r'[a-z0-9+#]+')
+SKILL_SET_NORM = {s.lower() for s in SKILL_SET}
+SKILL_SINGLE = {s for s in SKILL_SET_NORM if RE_SKILL_TOKEN.fullmatch(s)}
+SKILL_MULTI = [s for s in SKILL_SET_NORM if s not in SKILL_SINGLE]  # 'react native', 'power bi', ...
+SKILL_SYNONYM_TOKEN = {k: v.lower() for k, v in SKILL_SYNONYM.items() if RE_SKILL_TOKEN.fullmatch(k)}
+SKILL_SYNONYM_PHRASE = {k: v.lower() for k, v in SKILL_SYNONYM.items() if k not in SKILL_SYNONYM_TOKEN}
+# semua sinonim frasa diganti dalam satu pass (teks sudah lowercase), frasa terpanjang dulu
+RE_SKILL_SYNONYM_PHRASE = re.compile('|'.join(map(re.escape, sorted(SKILL_SYNONYM_PHRASE, key=len, reverse=True))))
+# nama tampilan tiap skill, dihitung sekali saat import
+SKILL_UPPER = {'c++','c#','aws','gcp','css','html','sql'}
+SKILL_CANON = {kw: kw.upper() if kw in SKILL_UPPER else kw.title() for kw in SKILL_SET_NORM}
+SKILL_CANON['rest'] = 'REST'
+
+# skill multi-kata (mengandung spasi) tidak bisa lewat token → satu automaton/regex untuk semuanya
+def _build_skill_multi_automaton():
+    if ahocorasick is None:
+        return None
+    A = ahocorasick.Automaton()
+    for kw in SKILL_MULTI:
+        A.add_word(kw, (kw, SKILL_CANON[kw]))
+    A.make_automaton()
+    return A
+
+SKILL_MULTI_AUTOMATON = _build_skill_multi_automaton()
+# fallback tanpa pyahocorasick: satu alternation, keyword terpanjang dulu
+RE_SKILL_MULTI = re.compile('|'.join(map(re.escape, sorted(SKILL_MULTI, key=len, reverse=True))))
+
+def _multi_skill_hits(scan: str) -> set:
+    if SKILL_MULTI_AUTOMATON is not None:
+        return {name for _, (_, name) in SKILL_MULTI_AUTOMATON.iter(scan)}
+    return {SKILL_CANON[kw] for kw in RE_SKILL_MULTI.findall(scan)}
+
+def _skill_hits(scan: str) -> set:
+    # sinonim frasa diganti dulu, lalu skill satu token (set lookup) + multi-kata
+    scan = RE_SKILL_SYNONYM_PHRASE.sub(lambda m: SKILL_SYNONYM_PHRASE[m.group(0)], scan)
+    tokens = {SKILL_SYNONYM_TOKEN.get(t, t) for t in RE_SKILL_TOKEN.findall(scan)}
+    return {SKILL_CANON[kw] for kw in tokens & SKILL_SINGLE} | _multi_skill_hits(scan)
+
 SKILL_SECTIONS = [
-    re.compile(r'(?is)(?:keahlian|keterampilan|kemampuan|skill[s]?|technical\s*skill[s]?)[\s:]*([\s\S]{0,600})'),
-    re.compile(r'(?is)(?:software|tool[s]?|teknologi|bahasa\s*pemrograman|programming\s*language[s]?)[\s:]*([\s\S]{0,400})'),
+    re.compile(r'(?s)(?:keahlian|keterampilan|kemampuan|skill[s]?|technical\s*skill[s]?)[\s:]*([\s\S]{0,600})'),
+    re.compile(r'(?s)(?:software|tool[s]?|teknologi|bahasa\s*pemrograman|programming\s*language[s]?)[\s:]*([\s\S]{0,400})'),
 ]
 
+# Aho-Corasick: semua keyword jurusan → (keyword, target) dalam satu automaton
+def _build_major_automaton():
+    if ahocorasick is None:
+        return None
+    A = ahocorasick.Automaton()
+    for kw, target in MAJOR_NORMALIZE.items():
+        A.add_word(kw, (kw, target))
+    A.make_automaton()
+    return A
+
+MAJOR_AUTOMATON = _build_major_automaton()
+
+def _is_word_char(c: str) -> bool:
+    return c.isalnum() or c == '_'
+
+def _major_hits(low: str) -> Dict[str, List[Tuple[int, int]]]:
+    """Span (start, end) tiap keyword MAJOR_NORMALIZE yang muncul sebagai kata utuh."""
+    hits: Dict[str, List[Tuple[int, int]]] = {}
+    n = len(low)
+    if MAJOR_AUTOMATON is None:
+        for m in RE_MAJOR_ANY.finditer(low):
+            start, kw = m.start(), m.group(1)
+            hits.setdefault(kw, []).append((start, start + len(kw)))
+            for p in _MAJOR_PREFIXES[kw]:
+                end = start + len(p)
+                if end >= n or not _is_word_char(low[end]):
+                    hits.setdefault(p, []).append((start, end))
+        return hits
+    for end, (kw, _) in MAJOR_AUTOMATON.iter(low):
+        start = end - len(kw) + 1
+        if start > 0 and _is_word_char(low[start - 1]): continue
+        if end + 1 < n and _is_word_char(low[end + 1]): continue
+        hits.setdefault(kw, []).append((start, end + 1))
+    return hits
+
+# ==============================
+# Teks cepat (pypdfium2 / pdfminer mentah)
+# ==============================
+def iter_pdfium_pages(pdf_path: str) -> Iterator[str]:
+    """Teks mentah per halaman via pypdfium2; halaman setelah consumer berhenti tidak di-decode."""
+    if pdfium is None:
+        return
+    try:
+        doc = pdfium.PdfDocument(pdf_path)
+    except Exception:
+        return
+    try:
+        for i in range(len(doc)):
+            page = doc[i]
+            try:
+                textpage = page.get_textpage()
+                t = textpage.get_text_range()
+                textpage.close()
+            finally:
+                page.close()
+            # pdfium menulis tanda hubung PDF sebagai U+FFFE; pdfplumber memberi '-'
+            if t: yield t.replace('\r\n', '\n').replace('\r', '\n').replace('\ufffe', '-')
+    except Exception:
+        return
+    finally:
+        doc.close()
+
+RE_HSPACE = re.compile(r'[ \t]+')
+
+def iter_pdfminer_pages(pdf_path: str) -> Iterator[str]:
+    """Teks per halaman langsung via TextConverter pdfminer (LAParams tanpa deteksi teks vertikal),
+    tanpa membangun chars/objects pdfplumber."""
+    try:
+        fp = open(pdf_path, 'rb')
+    except OSError:
+        return
+    buf = io.StringIO()
+    rsrc = PDFResourceManager(caching=True)
+    device = TextConverter(rsrc, buf, laparams=LAParams(detect_vertical=False))
+    try:
+        interpreter = PDFPageInterpreter(rsrc, device)
+        for page in PDFPage.get_pages(fp):
+            interpreter.process_page(page)
+            t = buf.getvalue().rstrip('\f')  # TextConverter menutup tiap halaman dengan \f
+            buf.seek(0); buf.truncate()
+            # LAParams sering memberi dua spasi antar kata; pola kita memakai spasi tunggal
+            if t: yield RE_HSPACE.sub(' ', t.replace('\r\n', '\n').replace('\r', '\n'))
+    except Exception:
+        return
+    finally:
+        device.close()
+        fp.close()
+
+def iter_fast_pages(pdf_path: str) -> Iterator[str]:
+    # pypdfium2 bila ada; tanpa pypdfium2, pdfminer mentah (FAST_TEXT_MODE) masih jauh lebih
+    # ringan dari pdfplumber karena tidak membangun chars/objects per halaman
+    if pdfium is not None:
+        yield from iter_pdfium_pages(pdf_path)
+    elif FAST_TEXT_MODE:
+        yield from iter_pdfminer_pages(pdf_path)
+
+def fast_text(pdf_path: str) -> str:
+    """Teks mentah semua halaman lewat jalur cepat, tanpa model layout pdfplumber."""
+    with closing(iter_fast_pages(pdf_path)) as pages:
+        return "\n".join(pages)
+
+# ==============================
+# Teks pdfplumber per halaman
+# ==============================
+def _page_text(page) -> Optional[str]:
+    # page.close() melepas cache objek/layout + textmap halaman agar RSS tidak terus naik
+    try:
+        return page.extract_text()
+    finally:
+        page.close()
+
+# ==============================
+# Cache teks (disk)
+# ==============================
+def _text_cache_path(pdf_path: str, tag: str = "") -> str:
+    # key berubah bila file diganti/diubah (mtime atau ukuran) atau opsi ekstraksi berbeda
+    st = os.stat(pdf_path)
+    key = f"{os.path.abspath(pdf_path)}|{st.st_mtime}|{st.st_size}|{tag}"
+    return os.path.join(TEXT_CACHE_DIR, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".txt")
+
+def load_cached_text(pdf_path: str, tag: str = "") -> Optional[str]:
+    if not USE_TEXT_CACHE:
+        return None
+    try:
+        with open(_text_cache_path(pdf_path, tag), encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return None
+
+def save_cached_text(pdf_path: str, text: str, tag: str = "") -> None:
+    # teks kosong tidak disimpan agar PDF gagal dicoba lagi (mis. setelah OCR dipasang)
+    if not USE_TEXT_CACHE or not text:
+        return
+    try:
+        path = _text_cache_path(pdf_path, tag)
+        os.makedirs(TEXT_CACHE_DIR, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)  # atomik; aman bila beberapa worker menulis
+    except OSError as e:
+        logger.warning("Could not write text cache for %s: %s", pdf_path, e)
+
+def clear_text_cache() -> None:
+    shutil.rmtree(TEXT_CACHE_DIR, ignore_errors=True)
+
 # ==============================
 # OCR fallback
 # ==============================
+# bahasa OCR ditebak dari nama file (satu model lebih cepat daripada 'eng+ind')
+RE_ENGLISH_HINT = re.compile(r'(?i)(?:^|[^a-z])(?:resume|english|eng)(?:[^a-z]|$)')
+def guess_ocr_lang(pdf_path: str) -> str:
+    return 'eng' if RE_ENGLISH_HINT.search(os.path.basename(pdf_path)) else 'ind'
+
+def _render_page(page):
+    try:
+        return page.to_image(resolution=OCR_RESOLUTION).original.convert('L')
+    finally:
+        page.close()
+
+def _ocr_pages(pdf, ocr_image) -> str:
+    # render tetap berurutan (pdfium tidak thread-safe); OCR berjalan paralel
+    # karena tesseract melepas GIL. Hasil disusun sesuai urutan halaman.
+    def run(page):
+        try:
+            return ocr_image(_render_page(page))
+        except Exception:
+            return ""
+    pages = pdf.pages
+    if len(pages) <= 2:
+        texts = [run(page) for page in pages]
+    else:
+        with ThreadPoolExecutor(max_workers=OCR_WORKERS) as executor:
+            futures = []
+            for page in pages:
+                try:
+                    futures.append(executor.submit(ocr_image, _render_page(page)))
+                except Exception:
+                    continue
+            texts = []
+            for fut in futures:
+                try:
+                    texts.append(fut.result())
+                except Exception:
+                    continue
+    return "".join(t + "\n" for t in texts if t)
+
+def _ocr_pages_tesserocr(pdf, lang: str) -> str:
+    # handle API per thread: model LSTM dimuat sekali per thread, tanpa subprocess per halaman
+    from tesserocr import PyTessBaseAPI, OEM, PSM
+    kwargs = {}
+    tessdata = os.path.join(os.path.dirname(TESSERACT_CMD), 'tessdata') if TESSERACT_CMD else ""
+    if tessdata and os.path.isdir(tessdata):
+        kwargs['path'] = tessdata
+    local = threading.local()
+    apis = []
+
+    def ocr_image(img) -> str:
+        api = getattr(local, 'api', None)
+        if api is None:
+            api = local.api = PyTessBaseAPI(lang=lang, oem=OEM.LSTM_ONLY, psm=PSM.SINGLE_BLOCK, **kwargs)
+            apis.append(api)
+        api.SetImage(img)
+        return api.GetUTF8Text()
+
+    try:
+        return _ocr_pages(pdf, ocr_image)
+    finally:
+        for api in apis:
+            api.End()
+
+def _ocr_pages_pytesseract(pdf, lang: str) -> str:
+    import pytesseract
+    if TESSERACT_CMD:
+        pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+    return _ocr_pages(pdf, lambda img: pytesseract.image_to_string(img, lang=lang, config=OCR_CONFIG))
+
 def try_ocr_pdf_pages(pdf_path: str) -> str:
     if not USE_OCR:
         return ""
+    # tesserocr (API persisten) bila terpasang, selain itu pytesseract
     try:
-        import pytesseract
-        from PIL import Image
-        if TESSERACT_CMD:
-            import pytesseract as _pt
-            _pt.pytesseract.tesseract_cmd = TESSERACT_CMD
+        import tesserocr  # noqa: F401
+        ocr_pages = _ocr_pages_tesserocr
     except Exception:
-        return ""
-    text = ""
+        try:
+            import pytesseract  # noqa: F401
+            ocr_pages = _ocr_pages_pytesseract
+        except Exception:
+            return ""
     try:
         with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                try:
-                    img = page.to_image(resolution=300).original
-                    t = pytesseract.image_to_string(img, lang='eng+ind')
-                    if t: text += t + "\n"
-                except Exception:
-                    continue
+            return ocr_pages(pdf, guess_ocr_lang(pdf_path))
     except Exception:
         return ""
-    return text
 
 # ==============================
 # Ekstraktor
 # ==============================
 class CVDataExtractor:
     # ---- text ----
-    def extract_text_from_pdf(self, pdf_path: str) -> str:
-        text = ""
+    def extract_text_from_pdf(self, pdf_path: str, extract_tables: bool = False) -> str:
+        # jalur cepat: pypdfium2/pdfminer; pdfplumber hanya bila teksnya kosong/pendek
+        text = fast_text(pdf_path)
+        if len(text) >= MIN_TEXT_CHARS:
+            return text
+        return self.extract_text_fallback(pdf_path, extract_tables=extract_tables)
+
+    def extract_text_fallback(self, pdf_path: str, extract_tables: bool = False) -> str:
+        # untuk PDF yang teksnya kosong/pendek: pdfplumber (2 pass), lalu OCR.
+        # Jalur termahal, jadi hasilnya di-cache di disk per (path, mtime, size).
+        tag = "tables" if extract_tables else ""
+        text = load_cached_text(pdf_path, tag)
+        if text is None:
+            text = self._read_text_fallback(pdf_path, extract_tables)
+            save_cached_text(pdf_path, text, tag)
+        return text
+
+    def _read_text_fallback(self, pdf_path: str, extract_tables: bool) -> str:
+        parts: List[str] = []
         try:
             with pdfplumber.open(pdf_path) as pdf:
+                # pass 1: teks saja (murah); cukup untuk PDF born-digital.
+                # Serial: pdfminer memegang GIL, thread per halaman justru lebih lambat
+                page_texts = [_page_text(page) for page in pdf.pages]
+                first_empty = bool(page_texts) and not page_texts[0]
+                parts.extend(t for t in page_texts if t)
+                text = "\n".join(parts)
+                if len(text) >= MIN_TEXT_CHARS:
+                    return text
+
+                # pass 2: teks pendek/kosong → tabel + toleransi alternatif halaman 1.
+                # extract_tables mahal: hanya bila diminta, atau bila halaman punya banyak
+                # edge (garis/kotak) yang menandakan tabel
                 for i, page in enumerate(pdf.pages):
-                    t = page.extract_text()
-                    if t: text += t + "\n"
                     try:
-                        for table in (page.extract_tables() or []):
-                            for row in (table or []):
-                                if row:
-                                    text += " | ".join([str(c) if c else "" for c in row]) + "\n"
+                        if extract_tables or len(page.edges) > TABLE_MIN_EDGES:
+                            for table in (page.extract_tables() or []):
+                                for row in (table or []):
+                                    if row:
+                                        parts.append(" | ".join(str(c) if c else "" for c in row))
                     except Exception:
                         pass
-                    if not t and i == 0:
+                    if first_empty and i == 0:
                         try:
                             alt = page.extract_text(x_tolerance=1, y_tolerance=1)
-                            if alt: text += alt + "\n"
+                            if alt: parts.append(alt)
                         except Exception:
                             pass
                         try:
                             words = page.extract_words()
-                            if words: text += " ".join([w["text"] for w in words]) + "\n"
+                            if words: parts.append(" ".join(w["text"] for w in words))
                         except Exception:
                             pass
+                    page.close()
         except Exception as e:
-            logger.error(f"Error reading PDF {pdf_path}: {e}")
+            logger.error("Error reading PDF %s: %s", pdf_path, e)
 
+        text = "\n".join(parts)
         if not text:
             ocr_text = try_ocr_pdf_pages(pdf_path)
             if ocr_text:
-                logger.info(f"OCR used for {os.path.basename(pdf_path)}")
+                logger.debug("OCR used for %s", os.path.basename(pdf_path))
                 text = ocr_text
         return text
 
     # ---- ipk ----
-    def extract_ipk(self, text: str) -> Optional[float]:
+    # Semua extractor di bawah menerima teks asli + versi lowercase-nya (opsional). Pipeline
+    # (extract_from_cv) me-lowercase sekali dan meneruskan text_lower; panggilan tunggal cukup
+    # memberi teks asli.
+    def extract_ipk(self, text: str, text_lower: Optional[str] = None) -> Optional[float]:
+        low = text.lower() if text_lower is None else text_lower
+        # finditer lazy: berhenti di match valid pertama tanpa mengumpulkan semua match
         for rex in RE_IPK_NEAR:
-            for m in rex.findall(text):
-                val = m if isinstance(m, str) else m[0]
-                val = val.replace(',', '.')
-                try:
-                    v = float(val)
-                    if 2.0 <= v <= 4.0:
-                        return round(v, 2)
-                except Exception:
-                    continue
+            for m in rex.finditer(low):
+                v = _parse_ipk(m.group(1))
+                if v is not None: return v
         return None
 
     # ---- jurusan (HANYA dari MAJOR_NORMALIZE di TEKS) ----
-    def extract_jurusan(self, text: str) -> Optional[str]:
-        low = text.lower()
+    def extract_jurusan(self, text: str, text_lower: Optional[str] = None) -> Optional[str]:
+        low = text.lower() if text_lower is None else text_lower
+        hits = _major_hits(low)
 
         # 1) degree +/- 40 char dari keyword jurusan
         for key, target in MAJOR_NORMALIZE.items():
+            spans = hits.get(key)
+            if not spans: continue
             # degree sebelum keyword
-            if re.search(rf'(?i)\b(S1|S2|S3|D1|D2|D3|D4)\b.{0,40}\b{re.escape(key)}\b', low):
-                deg = re.search(r'(?i)\b(S1|S2|S3|D1|D2|D3|D4)\b.{0,40}\b'+re.escape(key)+r'\b', low).group(1).upper()
-                return f"{deg} {target}"
+            for start, _ in spans:
+                m = RE_DEGREE_BEFORE.search(low[max(0, start - DEGREE_WINDOW):start])
+                if m: return f"{m.group(1).upper()} {target}"
             # degree sesudah keyword
-            if re.search(rf'(?i)\b{re.escape(key)}\b.{0,40}\b(S1|S2|S3|D1|D2|D3|D4)\b', low):
-                deg = re.search(rf'(?i)\b{re.escape(key)}\b.{0,40}\b(S1|S2|S3|D1|D2|D3|D4)\b', low).group(1).upper()
-                return f"{deg} {target}"
+            for _, end in spans:
+                m = RE_DEGREE_AFTER.match(low[end:end + DEGREE_WINDOW])
+                if m: return f"{m.group(1).upper()} {target}"
 
         # 2) singkatan degree + singkatan mayor (S1 SI, D3 TI, dll)
-        m = re.search(r'(?i)\b(S1|S2|S3|D1|D2|D3|D4)\s+(SI|TI|TK|DKV)\b', low)
+        m = RE_DEGREE_ABBREV.search(low)
         if m:
-            return f"{m.group(1).upper()} {ABBREV_MAP[m.group(2).lower()]}"
+            return f"{m.group(1).upper()} {ABBREV_MAP[m.group(2)]}"
 
         # 3) keyword jurusan saja (tanpa degree) → tetap kembalikan normalized,
         #    karena keyword-nya memang ada di TEKS (sesuai permintaan)
         for key, target in MAJOR_NORMALIZE.items():
-            if re.search(rf'(?i)\b{re.escape(key)}\b', low):
+            if key in hits:
                 # opsional: tambahkan default S1; kalau tak ingin, kembalikan target saja
                 return f"S1 {target}"
 
@@ -208,44 +573,98 @@ class CVDataExtractor:
         return None
 
     # ---- semester ----
-    def extract_semester(self, text: str) -> Optional[int]:
+    def extract_semester(self, text: str, text_lower: Optional[str] = None) -> Optional[int]:
+        low = text.lower() if text_lower is None else text_lower
         for rex in RE_SEM_NEAR:
-            for m in rex.findall(text):
-                try:
-                    v = int(m if isinstance(m, str) else m[0])
-                    if 1 <= v <= 12: return v
-                except Exception:
-                    continue
+            for m in rex.finditer(low):
+                v = _parse_semester(m.group(1))
+                if v is not None: return v
         return None
 
+    # ---- ipk + jurusan + semester ----
+    def extract_all(self, text: str, text_lower: Optional[str] = None) -> Dict[str, Any]:
+        low = text.lower() if text_lower is None else text_lower
+        ipk, semester = extract_fields(low)
+        return {
+            "ipk": ipk,
+            "jurusan": self.extract_jurusan(text, low),   # <- hanya dari teks
+            "semester": semester,
+        }
+
     # ---- skills ----
-    def extract_skills(self, text: str) -> List[str]:
-        low = text.lower()
-        zone = ""
-        for rex in SKILL_SECTIONS:
-            for m in rex.findall(text):
-                zone += " " + m
-        scan = zone.lower() if zone.strip() else low
-
-        for syn, canon in SKILL_SYNONYM.items():
-            scan = scan.replace(syn, canon.lower())
-
-        found = []
-        for kw in SKILL_SET:
-            if kw in scan:
-                name = kw.upper() if kw in {'c++','c#','aws','gcp','css','html','sql'} else kw.title()
-                if name.lower() == 'rest': name = 'REST'
-                found.append(name)
-        return sorted(set(found))
+    def extract_skills(self, text: str, text_lower: Optional[str] = None) -> List[str]:
+        low = text.lower() if text_lower is None else text_lower
+        zone = " ".join(m for rex in SKILL_SECTIONS for m in rex.findall(low))
+        scan = zone if zone.strip() else low
+
+        found = _skill_hits(scan)
+        if not found and scan is not low:
+            # zona tanpa skill: di urutan teks pdfium, header kolom samping (skills/tools) sering
+            # terpisah dari isinya → scan seluruh teks
+            found = _skill_hits(low)
+        return sorted(found)
 
     # ---- pipeline ----
-    def extract_from_cv(self, pdf_path: str) -> Dict[str, Any]:
+    def extract_from_cv(self, pdf_path: str, timestamp: Optional[str] = None) -> Dict[str, Any]:
+        # timestamp dibagi satu batch; panggilan tunggal memakai waktu sekarang
+        if timestamp is None:
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         filename = os.path.basename(pdf_path)
         nama = clean_person_name_from_filename(filename)
-        text = self.extract_text_from_pdf(pdf_path)
+
+        # halaman dibaca satu per satu; berhenti begitu IPK/jurusan/semester lengkap dan
+        # zona skill sudah selesai (tidak terpotong akhir buffer), sehingga halaman sisanya
+        # tidak pernah di-decode. Konsekuensi: isi halaman sisanya (zona skill lain, pola IPK/
+        # semester berprioritas lebih tinggi) tidak ikut dinilai.
+        # Field dicek per halaman baru; zona skill dipindai di buffer gabungan mulai dari akhir
+        # match sebelumnya (per regex), jadi urutan match sama dengan findall di extract_skills.
+        # Nilai akhir dihitung sekali di akhir.
+        parts: List[str] = []
+        low = ""
+        have_ipk = have_jurusan = have_semester = False
+        zone_seen = False
+        zone_resume = [0] * len(SKILL_SECTIONS)  # offset buffer untuk finditer berikutnya
+        stopped_early = False
+        with closing(iter_fast_pages(pdf_path)) as pages:
+            for page_text in pages:
+                page_low = page_text.lower()  # tiap halaman di-lowercase sekali saja
+                parts.append(page_text)
+                low = f"{low}\n{page_low}" if low else page_low
+                ipk, semester = extract_fields(page_low)
+                have_ipk = have_ipk or ipk is not None
+                have_semester = have_semester or semester is not None
+                jurusan = self.extract_jurusan(page_text, page_low)
+                have_jurusan = have_jurusan or jurusan is not None
+                # zona selesai = tangkapan {0,N} berhenti karena batasnya, bukan karena akhir buffer.
+                # Match yang terpotong akhir buffer dicocokkan ulang dari awalnya di halaman berikut
+                zone_open = False
+                for i, rex in enumerate(SKILL_SECTIONS):
+                    for m in rex.finditer(low, zone_resume[i]):
+                        zone_seen = True
+                        if m.end(1) == len(low):
+                            zone_open = True
+                            zone_resume[i] = m.start()
+                            break
+                        zone_resume[i] = m.end()
+                if have_ipk and have_jurusan and have_semester and zone_seen and not zone_open:
+                    stopped_early = True
+                    break
+        text = "\n".join(parts)  # kosong bila tidak ada halaman berteks
+
+        if not stopped_early and len(text) < MIN_TEXT_CHARS:
+            # bukan born-digital: pdfplumber/OCR untuk seluruh dokumen. Halaman 1 yang pendek
+            # tapi sudah lengkap (stopped_early) tidak perlu fallback
+            text = self.extract_text_fallback(pdf_path, extract_tables=ENABLE_TABLES)
+            low = text.lower()
+            fields = self.extract_all(text, low)
+        elif len(parts) == 1:
+            # satu halaman (kasus umum): hasil scan per halaman sudah = hasil akhir
+            fields = {"ipk": ipk, "jurusan": jurusan, "semester": semester}
+        else:
+            fields = self.extract_all(text, low)
 
         if not text:
-            logger.warning(f"No text extracted from {filename}")
+            logger.warning("No text extracted from %s", filename)
             return {
                 "nama": nama,
                 "ipk": None,
@@ -254,13 +673,11 @@ class CVDataExtractor:
                 "skills": "",
                 "skill_count": 0,
                 "extraction_status": "Failed - No text extracted",
-                "extraction_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "extraction_date": timestamp,
             }
 
-        ipk = self.extract_ipk(text)
-        jurusan = self.extract_jurusan(text)   # <- hanya dari teks
-        semester = self.extract_semester(text)
-        skills = self.extract_skills(text)
+        ipk, jurusan, semester = fields["ipk"], fields["jurusan"], fields["semester"]
+        skills = self.extract_skills(text, low)
 
         status = "Success"
         miss = []
@@ -276,49 +693,121 @@ class CVDataExtractor:
             "skills": ", ".join(skills) if skills else "",
             "skill_count": len(skills),
             "extraction_status": status,
-            "extraction_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "extraction_date": timestamp,
         }
 
     def process_cv_folder(self, folder_path: str, output_excel: str = None) -> pd.DataFrame:
         if not os.path.exists(folder_path):
             raise FileNotFoundError(f"Folder {folder_path} not found")
-        pdfs = [f for f in os.listdir(folder_path) if f.lower().endswith(".pdf")]
+        # scandir: is_file() memakai info dirent tanpa stat tambahan; e.path tanpa os.path.join.
+        # Diurutkan agar urutan baris deterministik antar OS/run
+        with os.scandir(folder_path) as it:
+            entries = sorted((e.name, e.path) for e in it if e.name[-4:].lower() == ".pdf" and e.is_file())
+        pdfs = [name for name, _ in entries]
         if not pdfs:
-            logger.warning(f"No PDF files found in {folder_path}")
+            logger.warning("No PDF files found in %s", folder_path)
             return pd.DataFrame()
 
-        logger.info(f"Found {len(pdfs)} PDF files to process")
-        rows = []
-        for i, f in enumerate(pdfs, 1):
-            p = os.path.join(folder_path, f)
-            logger.info(f"Processing {i}/{len(pdfs)}: {f}")
+        logger.info("Found %d PDF files to process", len(pdfs))
+        # satu PDF per task; urutan baris tetap mengikuti urutan file
+        batch_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        paths = [path for _, path in entries]
+        # hasil dikumpulkan per kolom; worker mengirim tuple berurutan OUTPUT_COLUMNS
+        columns: Dict[str, List[Any]] = {c: [] for c in OUTPUT_COLUMNS}
+        done = 0
+        with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            # map menjaga urutan file; chunksize mengurangi overhead IPC per task
+            results = executor.map(_worker, paths, repeat(batch_timestamp), chunksize=4)
+            if tqdm is not None:
+                results = tqdm(results, total=len(paths), desc="Processing CVs")
             try:
-                rows.append(self.extract_from_cv(p))
-            except Exception as e:
-                logger.error(f"Error processing {f}: {e}")
-                rows.append({
-                    "nama": clean_person_name_from_filename(f),
-                    "ipk": None, "jurusan": None, "semester": None,
-                    "skills": "", "skill_count": 0,
-                    "extraction_status": f"Error: {str(e)}",
-                    "extraction_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                })
-
-        df = pd.DataFrame(rows)
-        cols = ["nama","ipk","jurusan","semester","skills","skill_count","extraction_status","extraction_date"]
-        for c in cols:
-            if c not in df.columns: df[c] = pd.NA
-        df = df.reindex(columns=cols)
+                for values in results:
+                    for col, v in zip(columns.values(), values):
+                        col.append(v)
+                    done += 1
+            except Exception as e:  # mis. proses worker mati; sisa file ditandai error
+                logger.error("Worker pool failed after %d/%d files: %s", done, len(pdfs), e)
+                for f in pdfs[done:]:
+                    for col, v in zip(columns.values(), _row_values(_error_row(f, e, batch_timestamp))):
+                        col.append(v)
 
         if output_excel:
-            df.to_excel(output_excel, index=False, engine="openpyxl")
-            logger.info(f"Results saved to {output_excel}")
-        return df
+            write_excel(columns, output_excel)
+            logger.info("Results saved to %s", output_excel)
+        return pd.DataFrame(columns)
+
+# ==============================
+# Output
+# ==============================
+OUTPUT_COLUMNS = ["nama","ipk","jurusan","semester","skills","skill_count","extraction_status","extraction_date"]
+
+def _row_values(row: Dict[str, Any]) -> Tuple[Any, ...]:
+    # kolom yang tidak ada → None → sel kosong
+    return tuple(row.get(c) for c in OUTPUT_COLUMNS)
+
+def write_excel(columns: Dict[str, List[Any]], output_excel: str) -> None:
+    # baris di-stream langsung ke disk (xlsxwriter constant_memory / openpyxl write_only)
+    rows = zip(*(columns[c] for c in OUTPUT_COLUMNS))
+    try:
+        import xlsxwriter
+    except ImportError:
+        from openpyxl import Workbook
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet()
+        ws.append(OUTPUT_COLUMNS)
+        for row in rows:
+            ws.append(row)
+        wb.save(output_excel)
+        return
+    wb = xlsxwriter.Workbook(output_excel, {'constant_memory': True})
+    try:
+        ws = wb.add_worksheet()
+        ws.write_row(0, 0, OUTPUT_COLUMNS)
+        for r, row in enumerate(rows, 1):
+            ws.write_row(r, 0, row)
+    finally:
+        wb.close()
+
+# ==============================
+# Worker (process pool)
+# ==============================
+_WORKER_EXTRACTOR: Optional[CVDataExtractor] = None
+
+def _error_row(filename: str, e: Exception, timestamp: str) -> Dict[str, Any]:
+    return {
+        "nama": clean_person_name_from_filename(filename),
+        "ipk": None, "jurusan": None, "semester": None,
+        "skills": "", "skill_count": 0,
+        "extraction_status": f"Error: {str(e)}",
+        "extraction_date": timestamp,
+    }
+
+def _worker(pdf_path: str, timestamp: str) -> Tuple[Any, ...]:
+    # harus top-level agar bisa di-pickle; extractor dibuat sekali per proses.
+    # Mengembalikan tuple (urutan OUTPUT_COLUMNS): lebih kecil dari dict saat lewat IPC
+    global _WORKER_EXTRACTOR
+    if _WORKER_EXTRACTOR is None:
+        _WORKER_EXTRACTOR = CVDataExtractor()
+    try:
+        row = _WORKER_EXTRACTOR.extract_from_cv(pdf_path, timestamp=timestamp)
+    except Exception as e:  # satu PDF rusak tidak boleh menghentikan batch
+        filename = os.path.basename(pdf_path)
+        logger.error("Error processing %s: %s", filename, e)
+        row = _error_row(filename, e, timestamp)
+    return _row_values(row)
 
 # ==============================
 # MAIN
 # ==============================
 def main():
+    parser = argparse.ArgumentParser(description="Ekstraksi data CV (PDF) ke Excel")
+    parser.add_argument("--clear-cache", action="store_true",
+                        help=f"hapus cache teks di '{TEXT_CACHE_DIR}' sebelum mulai")
+    args = parser.parse_args()
+    if args.clear_cache:
+        clear_text_cache()
+        logger.info("Text cache cleared")
+
     cv_folder = "cv"
     output_excel = "cv_extracted_results_improved.xlsx"
     extractor = CVDataExtractor()